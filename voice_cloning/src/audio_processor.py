@@ -5,12 +5,56 @@ Módulo para processamento e conversão de áudio
 """
 
 import os
+import shlex
 import subprocess
 import shutil
+import threading
+import uuid
+from collections import deque
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 from config import AUDIO_CONFIG, PATHS
 
+# Caminho do ffmpeg resolvido uma única vez no PATH (None se não instalado)
+FFMPEG_PATH = shutil.which("ffmpeg")
+
+def run_ffmpeg(cmd: List[str], timeout: float) -> Tuple[int, str]:
+    """
+    Executa o ffmpeg guardando apenas as últimas linhas do stderr
+    
+    O stderr é drenado por uma thread para que o pipe nunca encha e trave o processo.
+    
+    Args:
+        cmd: Comando a executar
+        timeout: Tempo máximo em segundos
+        
+    Returns:
+        (returncode, últimas linhas do stderr)
+        
+    Raises:
+        subprocess.TimeoutExpired: se o processo exceder o timeout (o processo é encerrado)
+    """
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr_tail = deque(maxlen=80)
+    
+    def drain_stderr():
+        for line in process.stderr:
+            stderr_tail.append(line.decode('utf-8', errors='replace'))
+    
+    reader = threading.Thread(target=drain_stderr, daemon=True)
+    reader.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        reader.join(timeout=1)
+        process.stderr.close()
+    
+    return returncode, ''.join(stderr_tail)
+
 class AudioProcessor:
     """Classe responsável pelo processamento e conversão de áudio"""
     
@@ -37,10 +81,12 @@ class AudioProcessor:
         Returns:
             (is_valid, message)
         """
-        if not os.path.exists(file_path):
+        # Uma única chamada stat (existência + tamanho)
+        try:
+            file_size = os.stat(file_path).st_size
+        except OSError:
             return False, f"Arquivo não encontrado: {file_path}"
         
-        file_size = os.path.getsize(file_path)
         if file_size < self.min_file_size:
             return False, f"Arquivo muito pequeno: {file_size} bytes (mínimo: {self.min_file_size})"
         
@@ -125,20 +171,13 @@ class AudioProcessor:
             
             # Resample se necessário
             if original_sr != self.sample_rate:
-                try:
-                    import librosa
-                    data = librosa.resample(data, orig_sr=original_sr, target_sr=self.sample_rate)
-                    print(f"[INFO] Resampling com librosa: {original_sr} -> {self.sample_rate}Hz")
-                except ImportError:
-                    # Resampling simples sem librosa
-                    factor = self.sample_rate / original_sr
-                    new_length = int(len(data) * factor)
-                    data = np.interp(np.linspace(0, len(data), new_length), np.arange(len(data)), data)
-                    print(f"[INFO] Resampling simples: {original_sr} -> {self.sample_rate}Hz")
+                data = self._resample(data, original_sr)
             
-            # Normalizar
-            if np.max(np.abs(data)) > 0:
-                data = data / np.max(np.abs(data)) * 0.9
+            # Normalizar pelo pico (calculado uma vez, escala in-place)
+            peak = float(np.max(np.abs(data))) if data.size else 0.0
+            if peak > 0:
+                data = np.ascontiguousarray(data, dtype=np.float32)
+                data *= 0.9 / peak
             
             # Salvar
             sf.write(output_file, data, self.sample_rate, format='WAV', subtype='PCM_16')
@@ -158,6 +197,64 @@ class AudioProcessor:
             print(f"[ERROR] Erro no soundfile: {e}")
             return False
     
+    def _resample(self, data: "np.ndarray", original_sr: int) -> "np.ndarray":
+        """
+        Reamostra áudio mono em processo para a taxa configurada
+        
+        Usa resample polifásico do scipy (FIR vetorizado) quando disponível,
+        depois librosa e, por último, interpolação linear.
+        
+        Args:
+            data: Amostras float32 mono
+            original_sr: Taxa de amostragem original
+            
+        Returns:
+            Amostras reamostradas
+        """
+        import numpy as np
+        
+        try:
+            from math import gcd
+            from scipy.signal import resample_poly
+            
+            divisor = gcd(int(original_sr), int(self.sample_rate))
+            data = resample_poly(data, self.sample_rate // divisor, int(original_sr) // divisor)
+            print(f"[INFO] Resampling polifásico: {original_sr} -> {self.sample_rate}Hz")
+            return data.astype(np.float32)
+        except ImportError:
+            pass
+        
+        try:
+            import librosa
+            data = librosa.resample(data, orig_sr=original_sr, target_sr=self.sample_rate)
+            print(f"[INFO] Resampling com librosa: {original_sr} -> {self.sample_rate}Hz")
+            return data
+        except ImportError:
+            # Resampling simples sem librosa
+            factor = self.sample_rate / original_sr
+            new_length = int(len(data) * factor)
+            data = np.interp(np.linspace(0, len(data), new_length), np.arange(len(data)), data)
+            print(f"[INFO] Resampling simples: {original_sr} -> {self.sample_rate}Hz")
+            return data
+    
+    def _build_ffmpeg_command(self, input_file: str, output_file: str) -> List[str]:
+        """Monta o comando ffmpeg de conversão (caminhos absolutos)"""
+        # Uma única passada decode -> filtro -> encode
+        # (sem vídeo/legendas; resample, canais e formato no mesmo filter graph)
+        channel_layout = "mono" if self.channels == 1 else "stereo"
+        return [
+            FFMPEG_PATH, "-loglevel", "error", "-nostats",  # stderr só com erros
+            # Último método da cadeia: tolerar pacotes corrompidos em vez de falhar
+            "-err_detect", "ignore_err", "-fflags", "+genpts+discardcorrupt",
+            "-i", os.path.abspath(input_file),
+            "-vn", "-sn",
+            "-af", f"aresample={self.sample_rate},aformat=channel_layouts={channel_layout}:sample_fmts=s16",
+            "-acodec", "pcm_s16le",
+            "-f", self.format,
+            "-y",  # Sobrescrever
+            os.path.abspath(output_file)
+        ]
+    
     def convert_with_ffmpeg(self, input_file: str, output_file: str) -> bool:
         """
         Converte áudio usando ffmpeg
@@ -171,35 +268,20 @@ class AudioProcessor:
         """
         try:
             # Verificar se ffmpeg está disponível
-            ffmpeg_path = shutil.which("ffmpeg")
-            if not ffmpeg_path:
+            if not FFMPEG_PATH:
                 print("[WARNING] FFmpeg não encontrado no PATH")
                 return False
             
             print(f"[INFO] Convertendo com ffmpeg: {input_file} -> {output_file}")
-            print(f"[INFO] FFmpeg encontrado em: {ffmpeg_path}")
-            
-            # Usar caminhos absolutos
-            input_abs = os.path.abspath(input_file)
-            output_abs = os.path.abspath(output_file)
+            print(f"[INFO] FFmpeg encontrado em: {FFMPEG_PATH}")
             
-            # Comando ffmpeg
-            cmd = [
-                "ffmpeg", "-i", input_abs,
-                "-ar", str(self.sample_rate),
-                "-ac", str(self.channels),
-                "-acodec", "pcm_s16le",
-                "-f", self.format,
-                "-y",  # Sobrescrever
-                output_abs
-            ]
-            
-            print(f"[CMD] {' '.join(cmd)}")
+            cmd = self._build_ffmpeg_command(input_file, output_file)
+            print(f"[CMD] {shlex.join(cmd)}")
             
             # Executar com timeout
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            returncode, stderr_tail = run_ffmpeg(cmd, timeout=60)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 is_valid, msg = self.validate_audio_file(output_file)
                 if is_valid:
                     print(f"[OK] Conversão ffmpeg bem-sucedida: {msg}")
@@ -208,7 +290,7 @@ class AudioProcessor:
                     print(f"[ERROR] Arquivo convertido inválido: {msg}")
                     return False
             else:
-                print(f"[ERROR] FFmpeg falhou: {result.stderr}")
+                print(f"[ERROR] FFmpeg falhou: {stderr_tail}")
                 return False
                 
         except subprocess.TimeoutExpired:
@@ -245,13 +327,26 @@ class AudioProcessor:
             ("ffmpeg", self.convert_with_ffmpeg)
         ]
         
-        for method_name, method_func in methods:
-            try:
-                if method_func(input_file, output_file):
-                    return True, output_file
-            except Exception as e:
-                print(f"[WARNING] Método {method_name} falhou: {e}")
-                continue
+        # Converter em um arquivo temporário ao lado do destino e renomear no fim:
+        # uma conversão interrompida nunca deixa um WAV truncado no caminho final
+        base, ext = os.path.splitext(output_file)
+        temp_file = f"{base}.{uuid.uuid4().hex[:8]}.tmp{ext}"
+        
+        try:
+            for method_name, method_func in methods:
+                try:
+                    if method_func(input_file, temp_file):
+                        os.replace(temp_file, output_file)
+                        return True, output_file
+                except Exception as e:
+                    print(f"[WARNING] Método {method_name} falhou: {e}")
+                    continue
+        finally:
+            if os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                except OSError:
+                    pass
         
         print("[ERROR] Todos os métodos de conversão falharam")
         return False, None
@@ -273,11 +368,12 @@ class AudioProcessor:
         # Verificar se já está no formato correto
         file_ext = Path(reference_file).suffix.lower()
         if file_ext == '.wav':
-            # Verificar se já está no formato correto
+            # Verificar se já está no formato correto (apenas o cabeçalho, sem decodificar o áudio)
             try:
                 import soundfile as sf
-                data, sr = sf.read(reference_file)
-                if sr == self.sample_rate and data.shape[1] == self.channels if len(data.shape) > 1 else True:
+                info = sf.info(reference_file)
+                # WAV mono é usado como está; multicanal só se já tiver taxa e canais esperados
+                if info.channels == 1 or (info.samplerate == self.sample_rate and info.channels == self.channels):
                     print(f"[INFO] Arquivo já está no formato correto: {reference_file}")
                     return True, reference_file
             except:
@@ -286,6 +382,11 @@ class AudioProcessor:
         # Converter para formato correto
         output_file = str(Path(reference_file).with_suffix('.wav'))
         
+        # Reaproveitar conversão anterior se for mais nova que a origem e tiver cabeçalho WAV
+        if output_file != reference_file and self._is_fresh_wav(output_file, reference_file):
+            print(f"[INFO] Reutilizando áudio de referência já convertido: {output_file}")
+            return True, output_file
+        
         print(f"[INFO] Preparando áudio de referência: {reference_file}")
         success, converted_file = self.convert_audio(reference_file, output_file)
         
@@ -296,6 +397,22 @@ class AudioProcessor:
             print(f"[ERROR] Falha ao preparar áudio de referência: {reference_file}")
             return False, None
     
+    @staticmethod
+    def _is_fresh_wav(wav_file: str, source_file: str) -> bool:
+        """
+        Verifica se wav_file é um WAV (só os 12 bytes do cabeçalho RIFF) gerado depois de source_file
+        
+        Basta o cabeçalho porque convert_audio só publica o arquivo final completo (os.replace).
+        """
+        try:
+            if os.stat(wav_file).st_mtime_ns <= os.stat(source_file).st_mtime_ns:
+                return False
+            with open(wav_file, 'rb') as f:
+                header = f.read(12)
+        except OSError:
+            return False
+        return header[:4] == b'RIFF' and header[8:12] == b'WAVE'
+    
     def get_audio_info(self, file_path: str) -> Dict[str, Any]:
         """
         Obtém informações sobre um arquivo de áudio
@@ -306,10 +423,17 @@ class AudioProcessor:
         Returns:
             Dicionário com informações do áudio
         """
+        try:
+            file_size = os.stat(file_path).st_size
+            exists = True
+        except OSError:
+            file_size = 0
+            exists = False
+        
         info = {
             'file_path': file_path,
-            'exists': os.path.exists(file_path),
-            'file_size': os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            'exists': exists,
+            'file_size': file_size
         }
         
         if not info['exists']:
@@ -318,12 +442,14 @@ class AudioProcessor:
         # Tentar obter informações técnicas
         try:
             import soundfile as sf
-            data, sr = sf.read(file_path)
+            # Só o cabeçalho: duração e formato sem decodificar as amostras
+            audio_info = sf.info(file_path)
+            duration_seconds = audio_info.frames / audio_info.samplerate
             info.update({
-                'sample_rate': sr,
-                'channels': data.shape[1] if len(data.shape) > 1 else 1,
-                'duration_seconds': len(data) / sr,
-                'duration_ms': (len(data) / sr) * 1000
+                'sample_rate': audio_info.samplerate,
+                'channels': audio_info.channels,
+                'duration_seconds': duration_seconds,
+                'duration_ms': duration_seconds * 1000
             })
         except:
             info['error'] = "Não foi possível ler informações técnicas"
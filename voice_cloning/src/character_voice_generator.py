@@ -5,31 +5,49 @@ Módulo principal para geração de vozes por personagem com suporte a múltipla
 """
 
 import json
+import logging
 import os
+import sys
 import time
-from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+from dataclasses import dataclass, field
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-from config import PATHS, ensure_directory_exists, find_file_in_project, auto_detect_character_voices, get_available_voice_files
+from config import PATHS, ensure_directory_exists, find_file_in_project, auto_detect_character_voices, get_available_voice_files_with_sizes
 from text_cleaner import TextCleaner
 from audio_processor import AudioProcessor
 from tts_engines import TTSEngineManager
 
+logger = logging.getLogger(__name__)
+
 @dataclass
 class Character:
     """Representa um personagem da conversa"""
     id: str
     name: str
-    messages: List[Dict[str, Any]]
     voice_file: Optional[str] = None  # Arquivo de voz específico para este personagem
+    voice_basename: Optional[str] = None  # Nome do arquivo de voz (cache de os.path.basename)
     audio_count: int = 0
+    # Lista única de mensagens do gerador + índices das mensagens deste personagem
+    source_messages: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    message_indices: List[int] = field(default_factory=list, repr=False)
     
     def __post_init__(self):
         """Inicialização após criação"""
-        self.audio_count = len([msg for msg in self.messages if msg.get('texto', '').strip()])
+        self.audio_count = sum(1 for msg in self.messages if msg.get('texto', '').strip())
+        if self.voice_file:
+            self.voice_basename = os.path.basename(self.voice_file)
+    
+    def set_voice_file(self, voice_file: str):
+        """Define o arquivo de voz e guarda seu nome"""
+        self.voice_file = voice_file
+        self.voice_basename = os.path.basename(voice_file)
+    
+    @property
+    def messages(self) -> Iterator[Dict[str, Any]]:
+        """Mensagens do personagem (geradas sob demanda a partir dos índices)"""
+        return (self.source_messages[i] for i in self.message_indices)
 
 @dataclass
 class GenerationStats:
@@ -76,6 +94,7 @@ class CharacterVoiceGenerator:
         self.auto_detect_voices = auto_detect_voices
         self.detected_voices = {}
         self.available_voices = {}
+        self.voice_file_sizes: Dict[str, int] = {}  # caminho -> tamanho lido na varredura
         
         # Inicializar componentes
         self.text_cleaner = TextCleaner()
@@ -85,19 +104,27 @@ class CharacterVoiceGenerator:
         # Estado interno
         self.characters = {}
         self.messages = []
+        self.char_message_idx: Dict[str, List[int]] = {}  # char_id -> índices em self.messages
+        self.summary_only = False  # Apenas contagens por personagem, sem mensagens
         self.prepared_voices = {}  # Cache de vozes preparadas
         self.stats = GenerationStats()
         
         # Preparar ambiente
         self._setup_environment()
     
+    def warmup_model(self) -> bool:
+        """Carrega e aquece o modelo TTS com a voz padrão (pode rodar em outra thread antes da primeira síntese)"""
+        return self.tts_manager.warmup(self.prepared_voices.get('_default'))
+    
     def _setup_environment(self):
         """Configura o ambiente de trabalho"""
         # Garantir que diretórios existem
         ensure_directory_exists(self.output_base_dir)
         
         # Descobrir vozes disponíveis
-        self.available_voices = get_available_voice_files()
+        voice_scan = get_available_voice_files_with_sizes()
+        self.available_voices = {filename: path for filename, (path, _) in voice_scan.items()}
+        self.voice_file_sizes = {path: size for path, size in voice_scan.values()}
         print(f"[INFO] Vozes disponíveis encontradas: {len(self.available_voices)}")
         for filename, path in self.available_voices.items():
             print(f"  🎤 {filename}")
@@ -115,12 +142,14 @@ class CharacterVoiceGenerator:
             else:
                 print(f"[WARNING] Voz padrão não encontrada: {self.default_reference_audio}")
     
-    def load_messages_from_json(self, json_path: str) -> bool:
+    def load_messages_from_json(self, json_path: str, summary_only: bool = False) -> bool:
         """
         Carrega mensagens de arquivo JSON
         
         Args:
             json_path: Caminho para arquivo JSON
+            summary_only: Se deve guardar apenas a contagem de áudios por personagem
+                (modo leve para validação; não permite gerar áudios)
             
         Returns:
             True se sucesso
@@ -141,13 +170,18 @@ class CharacterVoiceGenerator:
             self.messages = data.get('mensagens', [])
             print(f"[OK] {len(self.messages)} mensagens carregadas")
             
-            # Limpar textos das mensagens
-            self.messages = self.text_cleaner.clean_message_batch(self.messages)
+            # Limpar textos das mensagens (recém-lidas do JSON: podem ser alteradas no lugar)
+            self.messages = self.text_cleaner.clean_message_batch(self.messages, copy=False)
             print(f"[INFO] {len(self.messages)} mensagens válidas após limpeza")
             
             # Extrair personagens
+            self.summary_only = summary_only
             self._extract_characters()
             
+            # No modo resumo as mensagens não são mantidas em memória
+            if summary_only:
+                self.messages = []
+            
             # Detectar vozes para personagens
             if self.auto_detect_voices:
                 self._auto_detect_character_voices()
@@ -164,8 +198,9 @@ class CharacterVoiceGenerator:
     def _extract_characters(self):
         """Extrai personagens únicos das mensagens"""
         self.characters = {}
+        self.char_message_idx = {}
         
-        for message in self.messages:
+        for i, message in enumerate(self.messages):
             user_data = message.get('usuario', {})
             char_id = user_data.get('id', 'unknown')
             char_name = user_data.get('nome', char_id)
@@ -175,22 +210,69 @@ class CharacterVoiceGenerator:
             
             # Criar ou atualizar personagem
             if char_id not in self.characters:
-                self.characters[char_id] = Character(
-                    id=char_id,
-                    name=char_name,
-                    messages=[]
-                )
+                if self.summary_only:
+                    # Sem referência à lista de mensagens, para que ela possa ser liberada
+                    self.characters[char_id] = Character(id=char_id, name=char_name)
+                else:
+                    self.characters[char_id] = Character(
+                        id=char_id,
+                        name=char_name,
+                        source_messages=self.messages,
+                        message_indices=self.char_message_idx.setdefault(char_id, [])
+                    )
+            
+            # No modo resumo, apenas contar
+            if self.summary_only:
+                if message.get('texto', '').strip():
+                    self.characters[char_id].audio_count += 1
+                continue
             
-            # Adicionar mensagem ao personagem
-            self.characters[char_id].messages.append(message)
+            # Registrar índice da mensagem para o personagem
+            self.char_message_idx[char_id].append(i)
         
         # Atualizar contadores
-        for character in self.characters.values():
-            character.audio_count = len([msg for msg in character.messages if msg.get('texto', '').strip()])
+        if not self.summary_only:
+            for character in self.characters.values():
+                character.audio_count = sum(1 for msg in character.messages if msg.get('texto', '').strip())
         
         print(f"[INFO] Personagens extraídos:")
         for char_id, character in self.characters.items():
             print(f"  - {character.name} ({char_id}): {character.audio_count} mensagens")
+        
+        if not self.summary_only:
+            self._prepare_output_dirs()
+    
+    def _prepare_output_dirs(self):
+        """Cria de uma vez os diretórios de saída de todos os personagens"""
+        # Uma leitura do diretório base; só os diretórios que faltam são criados
+        try:
+            with os.scandir(self.output_base_dir) as entries:
+                existing = {entry.name for entry in entries if entry.is_dir()}
+        except OSError:
+            existing = set()
+        
+        for char_id in self.characters:
+            if char_id not in existing:
+                os.makedirs(os.path.join(self.output_base_dir, char_id), exist_ok=True)
+    
+    def _ordered_message_indices(self, character_id: str) -> List[int]:
+        """
+        Retorna os índices das mensagens do personagem, das mais curtas às mais longas
+        
+        Gerar primeiro os textos curtos entrega os primeiros áudios mais cedo
+        para os consumidores seguintes (montagem de vídeo, progresso).
+        
+        Args:
+            character_id: ID do personagem
+            
+        Returns:
+            Lista de índices em self.messages
+        """
+        def sort_key(index: int) -> Tuple[int, str]:
+            message = self.messages[index]
+            return len(message.get('texto', '')), str(message.get('id', ''))
+        
+        return sorted(self.char_message_idx.get(character_id, []), key=sort_key)
     
     def _auto_detect_character_voices(self):
         """Detecta automaticamente vozes para os personagens"""
@@ -198,13 +280,13 @@ class CharacterVoiceGenerator:
             return
         
         character_ids = list(self.characters.keys())
-        self.detected_voices = auto_detect_character_voices(character_ids)
+        self.detected_voices = auto_detect_character_voices(character_ids, self.available_voices)
         
         # Aplicar vozes detectadas aos personagens
         for char_id, voice_path in self.detected_voices.items():
             if char_id in self.characters:
-                self.characters[char_id].voice_file = voice_path
-                print(f"[AUTO] Voz atribuída a {self.characters[char_id].name}: {Path(voice_path).name}")
+                self.characters[char_id].set_voice_file(voice_path)
+                print(f"[AUTO] Voz atribuída a {self.characters[char_id].name}: {self.characters[char_id].voice_basename}")
     
     def _apply_voice_mapping(self):
         """Aplica mapeamento manual de vozes"""
@@ -213,7 +295,7 @@ class CharacterVoiceGenerator:
                 # Procurar arquivo de voz
                 voice_path = find_file_in_project(voice_filename)
                 if voice_path:
-                    self.characters[char_id].voice_file = voice_path
+                    self.characters[char_id].set_voice_file(voice_path)
                     print(f"[MANUAL] Voz atribuída a {self.characters[char_id].name}: {voice_filename}")
                 else:
                     print(f"[WARNING] Voz não encontrada para {char_id}: {voice_filename}")
@@ -238,8 +320,8 @@ class CharacterVoiceGenerator:
             print(f"[ERROR] Arquivo de voz não encontrado: {voice_file}")
             return False
         
-        self.characters[character_id].voice_file = voice_path
-        print(f"[OK] Voz definida para {self.characters[character_id].name}: {Path(voice_path).name}")
+        self.characters[character_id].set_voice_file(voice_path)
+        print(f"[OK] Voz definida para {self.characters[character_id].name}: {self.characters[character_id].voice_basename}")
         return True
     
     def _prepare_character_voice(self, character_id: str) -> Optional[str]:
@@ -266,7 +348,7 @@ class CharacterVoiceGenerator:
             success, prepared_voice = self.audio_processor.prepare_reference_audio(character.voice_file)
             if success:
                 self.prepared_voices[cache_key] = prepared_voice
-                print(f"[OK] Voz de {character.name} preparada: {Path(prepared_voice).name}")
+                print(f"[OK] Voz de {character.name} preparada: {os.path.basename(prepared_voice)}")
                 return prepared_voice
             else:
                 print(f"[WARNING] Falha ao preparar voz de {character.name}")
@@ -296,8 +378,14 @@ class CharacterVoiceGenerator:
             }
             
             if character.voice_file:
-                voice_info['voice_filename'] = Path(character.voice_file).name
-                voice_info['voice_size'] = os.path.getsize(character.voice_file) if os.path.exists(character.voice_file) else 0
+                voice_info['voice_filename'] = character.voice_basename
+                voice_size = self.voice_file_sizes.get(character.voice_file)
+                if voice_size is None:
+                    try:
+                        voice_size = os.stat(character.voice_file).st_size
+                    except OSError:
+                        voice_size = 0
+                voice_info['voice_size'] = voice_size
             
             info[char_id] = voice_info
         
@@ -354,11 +442,12 @@ class CharacterVoiceGenerator:
             return 0, 0
         
         character = self.characters[character_id]
+        message_indices = self._ordered_message_indices(character_id)
         start_time = time.time()
         
         print(f"\n[INFO] Gerando áudios para {character.name} ({character_id}) - PARALELO")
         print(f"[INFO] Início: {datetime.now().strftime('%H:%M:%S')}")
-        print(f"[INFO] Total de mensagens: {len(character.messages)}")
+        print(f"[INFO] Total de mensagens: {len(message_indices)}")
         print(f"[INFO] Workers paralelos: {max_workers}")
         
         # Preparar voz do personagem
@@ -366,18 +455,20 @@ class CharacterVoiceGenerator:
         if use_voice_cloning:
             reference_audio = self._prepare_character_voice(character_id)
             if reference_audio:
-                print(f"[INFO] Usando voz específica: {Path(reference_audio).name}")
+                print(f"[INFO] Usando voz específica: {os.path.basename(reference_audio)}")
             else:
                 print(f"[WARNING] Voz não disponível, usando TTS básico")
+        voice_key = os.path.basename(reference_audio) if reference_audio else "tts_basico"
         
-        # Criar diretório do personagem
+        # Diretório do personagem (criado em _prepare_output_dirs)
         char_output_dir = os.path.join(self.output_base_dir, character_id)
-        ensure_directory_exists(char_output_dir)
         
         # Preparar argumentos para processamento paralelo
         tasks = []
-        for i, message in enumerate(character.messages):
-            msg_id = message.get('id', f'msg_{i}')
+        for msg_index in message_indices:
+            message = self.messages[msg_index]
+            # ID de fallback pelo índice original (a ordem de geração segue o tamanho do texto)
+            msg_id = message.get('id', f'msg_{msg_index}')
             texto = message.get('texto', '').strip()
             
             if not texto:
@@ -426,7 +517,6 @@ class CharacterVoiceGenerator:
                         print(f"[PROGRESS] ✅ [{completed}/{len(tasks)}] {msg_id}: '{texto}...' - SUCESSO")
                         
                         # Atualizar estatísticas de uso de voz
-                        voice_key = Path(reference_audio).name if reference_audio else "tts_basico"
                         self.stats.voice_usage_stats[voice_key] = self.stats.voice_usage_stats.get(voice_key, 0) + 1
                     else:
                         falhas += 1
@@ -466,30 +556,35 @@ class CharacterVoiceGenerator:
             return 0, 0
         
         character = self.characters[character_id]
+        message_indices = self._ordered_message_indices(character_id)
         start_time = time.time()
         
         print(f"\n[INFO] Gerando áudios para {character.name} ({character_id}) - SEQUENCIAL")
         print(f"[INFO] Início: {datetime.now().strftime('%H:%M:%S')}")
-        print(f"[INFO] Total de mensagens: {len(character.messages)}")
+        print(f"[INFO] Total de mensagens: {len(message_indices)}")
         
         # Preparar voz do personagem
         reference_audio = None
         if use_voice_cloning:
             reference_audio = self._prepare_character_voice(character_id)
             if reference_audio:
-                print(f"[INFO] Usando voz específica: {Path(reference_audio).name}")
+                print(f"[INFO] Usando voz específica: {os.path.basename(reference_audio)}")
             else:
                 print(f"[WARNING] Voz não disponível, usando TTS básico")
+        voice_key = os.path.basename(reference_audio) if reference_audio else "tts_basico"
         
-        # Criar diretório do personagem
+        # Diretório do personagem (criado em _prepare_output_dirs)
         char_output_dir = os.path.join(self.output_base_dir, character_id)
-        ensure_directory_exists(char_output_dir)
         
         sucessos = 0
         falhas = 0
         
-        for i, message in enumerate(character.messages, 1):
-            msg_id = message.get('id', f'msg_{i}')
+        # Montar o lote de mensagens do personagem
+        batch = []  # (msg_id, texto, output_file)
+        for i, msg_index in enumerate(message_indices, 1):
+            message = self.messages[msg_index]
+            # ID de fallback pelo índice original (a ordem de geração segue o tamanho do texto)
+            msg_id = message.get('id', f'msg_{msg_index}')
             texto = message.get('texto', '').strip()
             
             if not texto:
@@ -499,34 +594,36 @@ class CharacterVoiceGenerator:
             # Nome do arquivo
             output_file = os.path.join(char_output_dir, f"msg_{msg_id}_{character_id}.wav")
             
-            print(f"\n[{i}/{len(character.messages)}] Processando mensagem {msg_id}")
+            print(f"\n[{i}/{len(message_indices)}] Processando mensagem {msg_id}")
             print(f"[INFO] Texto: {texto[:60]}{'...' if len(texto) > 60 else ''}")
             print(f"[INFO] Arquivo: {output_file}")
             if reference_audio:
-                print(f"[INFO] Voz: {Path(reference_audio).name}")
+                print(f"[INFO] Voz: {voice_key}")
             
+            batch.append((msg_id, texto, output_file))
+        
+        if batch:
             try:
-                # Gerar áudio
-                success = self.tts_manager.synthesize_with_best_engine(
-                    text=texto,
-                    output_file=output_file,
+                # Gerar áudios em lote (a voz de referência é condicionada uma única vez)
+                results = self.tts_manager.synthesize_batch_with_best_engine(
+                    texts=[texto for _, texto, _ in batch],
+                    output_files=[output_file for _, _, output_file in batch],
                     reference_audio=reference_audio
                 )
-                
+            except Exception as e:
+                print(f"[ERROR] Erro no lote de {character.name}: {e}")
+                results = [False] * len(batch)
+            
+            for (msg_id, _, output_file), success in zip(batch, results):
                 if success:
                     sucessos += 1
                     print(f"[OK] Áudio gerado: {output_file}")
                     
                     # Atualizar estatísticas de uso de voz
-                    voice_key = Path(reference_audio).name if reference_audio else "tts_basico"
                     self.stats.voice_usage_stats[voice_key] = self.stats.voice_usage_stats.get(voice_key, 0) + 1
                 else:
                     falhas += 1
                     print(f"[ERROR] Falha ao gerar: {output_file}")
-                
-            except Exception as e:
-                falhas += 1
-                print(f"[ERROR] Erro na mensagem {msg_id}: {e}")
         
         # Relatório final
         end_time = time.time()
@@ -534,7 +631,7 @@ class CharacterVoiceGenerator:
         
         print(f"\n[SUMMARY] {character.name} - SEQUENCIAL:")
         print(f"  ⏱️  Duração: {duration:.2f}s")
-        print(f"  📊 Taxa: {len(character.messages)/duration:.2f} mensagens/segundo")
+        print(f"  📊 Taxa: {len(message_indices)/duration:.2f} mensagens/segundo")
         print(f"  ✅ Sucessos: {sucessos}")
         print(f"  ❌ Falhas: {falhas}")
         print(f"  📈 Taxa de sucesso: {(sucessos/(sucessos+falhas)*100):.1f}%")
@@ -552,6 +649,9 @@ class CharacterVoiceGenerator:
         Returns:
             (sucessos, falhas)
         """
+        if self.summary_only:
+            raise NotImplementedError("summary_only mode")
+        
         # Usar versão paralela se habilitada na config
         from config import PARALLEL_CONFIG
         
@@ -572,6 +672,9 @@ class CharacterVoiceGenerator:
         Returns:
             Estatísticas de geração
         """
+        if self.summary_only:
+            raise NotImplementedError("summary_only mode")
+        
         overall_start_time = time.time()
         start_time_str = datetime.now().strftime('%H:%M:%S')
         
@@ -584,13 +687,11 @@ class CharacterVoiceGenerator:
         print(f"🎤 Clonagem de voz: {'Ativada' if use_voice_cloning else 'Desativada'}")
         print(f"📁 Diretório de saída: {self.output_base_dir}")
         
-        # Mostrar mapeamento de vozes
-        voice_info = self.get_character_voice_info()
+        # Mostrar mapeamento de vozes (direto dos personagens, sem montar o dicionário de get_character_voice_info)
         print(f"\n📋 Mapeamento de vozes:")
-        for char_id, info in voice_info.items():
-            voice_status = "✅" if info['voice_available'] else "❌"
-            voice_name = info.get('voice_filename', 'Nenhuma')
-            print(f"  {voice_status} {info['character_name']}: {voice_name}")
+        for character in self.characters.values():
+            voice_status = "✅" if character.voice_file else "❌"
+            print(f"  {voice_status} {character.name}: {character.voice_basename or 'Nenhuma'}")
         
         # Resetar estatísticas
         self.stats = GenerationStats()
@@ -624,44 +725,48 @@ class CharacterVoiceGenerator:
         overall_duration = time.time() - overall_start_time
         end_time_str = datetime.now().strftime('%H:%M:%S')
         
-        print(f"\n{'='*60}")
-        print(f"RELATÓRIO FINAL DE GERAÇÃO COM TTS 2.0 - PARALELO")
-        print(f"{'='*60}")
-        print(f"🕐 Início: {start_time_str}")
-        print(f"🕐 Fim: {end_time_str}")
-        print(f"⏱️  Duração total: {overall_duration:.2f}s")
-        print(f"📊 Taxa média: {len(self.messages)/overall_duration:.2f} mensagens/segundo")
-        print(f"")
-        print(f"📈 Estatísticas gerais:")
-        print(f"  📝 Total de mensagens: {self.stats.total_messages}")
-        print(f"  👥 Total de personagens: {self.stats.total_characters}")
-        print(f"  ✅ Sucessos: {self.stats.successful_generations}")
-        print(f"  ❌ Falhas: {self.stats.failed_generations}")
-        print(f"  📊 Taxa de sucesso: {self.stats.success_rate:.1f}%")
-        
-        print(f"\n👥 Sucessos por personagem:")
+        lines = [
+            f"\n{'='*60}",
+            "RELATÓRIO FINAL DE GERAÇÃO COM TTS 2.0 - PARALELO",
+            f"{'='*60}",
+            f"🕐 Início: {start_time_str}",
+            f"🕐 Fim: {end_time_str}",
+            f"⏱️  Duração total: {overall_duration:.2f}s",
+            f"📊 Taxa média: {len(self.messages)/overall_duration:.2f} mensagens/segundo",
+            "",
+            "📈 Estatísticas gerais:",
+            f"  📝 Total de mensagens: {self.stats.total_messages}",
+            f"  👥 Total de personagens: {self.stats.total_characters}",
+            f"  ✅ Sucessos: {self.stats.successful_generations}",
+            f"  ❌ Falhas: {self.stats.failed_generations}",
+            f"  📊 Taxa de sucesso: {self.stats.success_rate:.1f}%",
+            "\n👥 Sucessos por personagem:",
+        ]
+        
         for char_id, character in self.characters.items():
             sucessos = self.stats.characters_stats.get(char_id, 0)
             total_msgs = character.audio_count
             taxa = (sucessos/total_msgs*100) if total_msgs > 0 else 0
-            voz = character.voice_file or "TTS Básico"
-            print(f"  - {character.name}: {sucessos}/{total_msgs} ({taxa:.1f}%) - Voz: {Path(voz).name if voz != 'TTS Básico' else voz}")
+            voz = character.voice_basename or "TTS Básico"
+            lines.append(f"  - {character.name}: {sucessos}/{total_msgs} ({taxa:.1f}%) - Voz: {voz}")
         
-        print(f"\n🎤 Uso de vozes:")
+        lines.append("\n🎤 Uso de vozes:")
         for voice_name, count in self.stats.voice_usage_stats.items():
-            print(f"  - {voice_name}: {count} usos")
+            lines.append(f"  - {voice_name}: {count} usos")
         
-        print(f"\n📁 Estrutura de saída:")
-        print(f"  {self.output_base_dir}/")
-        for char_id, character in self.characters.items():
-            char_dir = os.path.join(self.output_base_dir, char_id)
-            if os.path.exists(char_dir):
-                audio_files = len([f for f in os.listdir(char_dir) if f.endswith('.wav')])
-                print(f"  ├── {char_id}/ ({audio_files} arquivos)")
-            else:
-                print(f"  ├── {char_id}/ (vazio)")
+        lines.append("\n📁 Estrutura de saída:")
+        lines.append(f"  {self.output_base_dir}/")
+        for char_id in self.characters:
+            try:
+                audio_files = sum(1 for f in os.listdir(os.path.join(self.output_base_dir, char_id)) if f.endswith('.wav'))
+                lines.append(f"  ├── {char_id}/ ({audio_files} arquivos)")
+            except OSError:
+                lines.append(f"  ├── {char_id}/ (vazio)")
         
-        print(f"{'='*60}")
+        lines.append(f"{'='*60}")
+        
+        # Uma única escrita no stdout
+        sys.stdout.write("\n".join(lines) + "\n")
         
         return self.stats
     
@@ -700,11 +805,28 @@ class CharacterVoiceGenerator:
             if character_voice:
                 # Usar voz específica fornecida
                 voice_path = find_file_in_project(character_voice)
+                # mtime e tamanho na chave: um arquivo de voz substituído é preparado de novo
+                cache_key = None
+                if voice_path:
+                    try:
+                        st = os.stat(voice_path)
+                        cache_key = (voice_path, st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        voice_path = None  # Removido depois de encontrado: usar a voz padrão
                 if voice_path:
-                    success, prepared_voice = self.audio_processor.prepare_reference_audio(voice_path)
+                    # Reutilizar voz já preparada (evita reprocessar o mesmo arquivo a cada mensagem)
+                    if cache_key in self.prepared_voices:
+                        success, prepared_voice = True, self.prepared_voices[cache_key]
+                    else:
+                        success, prepared_voice = self.audio_processor.prepare_reference_audio(voice_path)
+                        if success:
+                            # Descartar versões anteriores do mesmo arquivo
+                            for key in [k for k in self.prepared_voices if isinstance(k, tuple) and k[0] == voice_path]:
+                                del self.prepared_voices[key]
+                            self.prepared_voices[cache_key] = prepared_voice
                     if success:
                         reference_audio = prepared_voice
-                        print(f"[INFO] Usando voz específica: {Path(character_voice).name}")
+                        print(f"[INFO] Usando voz específica: {os.path.basename(character_voice)}")
                     else:
                         print(f"[WARNING] Falha ao preparar voz: {character_voice}")
                 else:
@@ -724,35 +846,43 @@ class CharacterVoiceGenerator:
     
     def _print_final_report(self):
         """Imprime relatório final de geração com informações de vozes"""
-        print(f"\n{'='*60}")
-        print(f"RELATÓRIO FINAL DE GERAÇÃO COM MÚLTIPLAS VOZES")
-        print(f"{'='*60}")
-        print(f"Total de mensagens: {self.stats.total_messages}")
-        print(f"Total de personagens: {self.stats.total_characters}")
-        print(f"Sucessos: {self.stats.successful_generations}")
-        print(f"Falhas: {self.stats.failed_generations}")
-        print(f"Taxa de sucesso: {self.stats.success_rate:.1f}%")
-        print(f"")
-        print(f"Sucessos por personagem:")
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
+        lines = [
+            f"\n{'='*60}",
+            "RELATÓRIO FINAL DE GERAÇÃO COM MÚLTIPLAS VOZES",
+            f"{'='*60}",
+            f"Total de mensagens: {self.stats.total_messages}",
+            f"Total de personagens: {self.stats.total_characters}",
+            f"Sucessos: {self.stats.successful_generations}",
+            f"Falhas: {self.stats.failed_generations}",
+            f"Taxa de sucesso: {self.stats.success_rate:.1f}%",
+            "",
+            "Sucessos por personagem:",
+        ]
         
         for char_id, character in self.characters.items():
             sucessos = self.stats.characters_stats.get(char_id, 0)
             total = character.audio_count
             taxa = (sucessos / total * 100) if total > 0 else 0
-            voice_name = Path(character.voice_file).name if character.voice_file else "TTS Básico"
-            print(f"  - {character.name}: {sucessos}/{total} ({taxa:.1f}%) - Voz: {voice_name}")
+            voice_name = character.voice_basename or "TTS Básico"
+            lines.append(f"  - {character.name}: {sucessos}/{total} ({taxa:.1f}%) - Voz: {voice_name}")
         
-        print(f"")
-        print(f"Uso de vozes:")
+        lines.append("")
+        lines.append("Uso de vozes:")
         for voice, count in self.stats.voice_usage_stats.items():
-            print(f"  - {voice}: {count} áudios")
+            lines.append(f"  - {voice}: {count} áudios")
         
-        print(f"")
-        print(f"Estrutura de saída:")
-        print(f"  {self.output_base_dir}/")
+        lines.append("")
+        lines.append("Estrutura de saída:")
+        lines.append(f"  {self.output_base_dir}/")
         for char_id in self.characters.keys():
-            print(f"  ├── {char_id}/")
-        print(f"{'='*60}")
+            lines.append(f"  ├── {char_id}/")
+        lines.append(f"{'='*60}")
+        
+        # Uma única escrita no stdout
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def list_available_voices(self):
         """Lista todas as vozes disponíveis no sistema"""
@@ -777,7 +907,7 @@ class CharacterVoiceGenerator:
         print("-" * 40)
         
         for filename, path in self.available_voices.items():
-            file_size = os.path.getsize(path) / 1024 / 1024  # MB
+            file_size = self.voice_file_sizes.get(path, 0) / (1024 * 1024)  # MB
             print(f"📄 {filename}")
             print(f"   📍 {path}")
             print(f"   📊 {file_size:.1f} MB")
@@ -797,8 +927,11 @@ class CharacterVoiceGenerator:
         if not available_engines:
             issues.append("Nenhuma engine TTS disponível")
         
-        # Verificar mensagens carregadas
-        if not self.messages:
+        # Verificar mensagens carregadas (no modo resumo só há contagens)
+        if self.summary_only:
+            if not any(character.audio_count for character in self.characters.values()):
+                issues.append("Nenhuma mensagem carregada")
+        elif not self.messages:
             issues.append("Nenhuma mensagem carregada")
         
         # Verificar personagens
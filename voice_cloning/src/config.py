@@ -24,6 +24,8 @@ TTS_CONFIG = {
     'rate': 150,  # para pyttsx3
     'timeout': 60,  # segundos
     'auto_accept_license': True,  # Auto-accept license prompts
+    'device': "auto",  # "auto" (CUDA se disponível), "cuda" ou "cpu"
+    'mixed_precision': True,  # Autocast BF16 na inferência em CUDA (se a GPU suportar BF16)
 }
 
 # Configurações de paralelismo
@@ -130,13 +132,8 @@ def ensure_directory_exists(path: str) -> None:
     """Garante que o diretório existe"""
     Path(path).mkdir(parents=True, exist_ok=True)
 
-def get_available_voice_files() -> dict:
-    """
-    Retorna dicionário com arquivos de voz disponíveis no sistema
-    
-    Returns:
-        Dict com padrão: {"filename": "full_path"}
-    """
+def _scan_voice_files(with_sizes: bool) -> dict:
+    """Varre os diretórios de voz; com with_sizes, o valor é (caminho, tamanho em bytes)"""
     voice_files = {}
     
     # Extensões de áudio suportadas
@@ -151,23 +148,52 @@ def get_available_voice_files() -> dict:
         get_project_root() / 'tts2.0'
     ]
     
+    # Sem diretórios repetidos (script e raiz do projeto costumam coincidir)
+    search_dirs = list(dict.fromkeys(search_dirs))
+    
     for search_dir in search_dirs:
-        if search_dir.exists():
-            for file_path in search_dir.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() in audio_extensions:
-                    # Filtrar apenas arquivos que parecem ser vozes
-                    filename = file_path.name.lower()
-                    if any(keyword in filename for keyword in ['voz', 'voice', 'audio', 'som']):
-                        voice_files[file_path.name] = str(file_path.absolute())
+        # os.scandir reaproveita o tipo da entrada lido do diretório (sem stat por arquivo)
+        try:
+            entries = os.scandir(search_dir)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                filename = entry.name.lower()
+                if os.path.splitext(filename)[1] not in audio_extensions:
+                    continue
+                # Filtrar apenas arquivos que parecem ser vozes
+                if any(keyword in filename for keyword in ['voz', 'voice', 'audio', 'som']) and entry.is_file():
+                    path = os.path.abspath(entry.path)
+                    voice_files[entry.name] = (path, entry.stat().st_size) if with_sizes else path
     
     return voice_files
 
-def auto_detect_character_voices(character_ids: list) -> dict:
+def get_available_voice_files() -> dict:
+    """
+    Retorna dicionário com arquivos de voz disponíveis no sistema
+    
+    Returns:
+        Dict com padrão: {"filename": "full_path"}
+    """
+    return _scan_voice_files(with_sizes=False)
+
+def get_available_voice_files_with_sizes() -> dict:
+    """
+    Igual a get_available_voice_files, mas já traz o tamanho lido na varredura
+    
+    Returns:
+        Dict com padrão: {"filename": ("full_path", size_bytes)}
+    """
+    return _scan_voice_files(with_sizes=True)
+
+def auto_detect_character_voices(character_ids: list, available_voices: dict = None) -> dict:
     """
     Detecta automaticamente vozes para personagens baseado em padrões
     
     Args:
         character_ids: Lista de IDs de personagens
+        available_voices: Resultado já obtido de get_available_voice_files (evita nova varredura)
         
     Returns:
         Dict mapeando character_id -> voice_file_path
@@ -176,7 +202,8 @@ def auto_detect_character_voices(character_ids: list) -> dict:
         return {}
     
     detected_voices = {}
-    available_voices = get_available_voice_files()
+    if available_voices is None:
+        available_voices = get_available_voice_files()
     
     for char_id in character_ids:
         # Tentar cada padrão de nome
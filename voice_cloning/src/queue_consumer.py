@@ -15,7 +15,12 @@ os.environ['LIBROSA_CACHE_LEVEL'] = '0'
 import sys
 import json
 import time
+import signal
 import logging
+import threading
+import subprocess
+import importlib.util
+import importlib.metadata
 import traceback
 from typing import Dict, Any, Optional
 from datetime import datetime
@@ -29,20 +34,25 @@ sys.path.insert(0, str(current_dir))
 # Install Coqui TTS if not available
 def ensure_coqui_tts_installed():
     """Ensure Coqui TTS is installed at runtime"""
-    try:
-        import TTS
-        print(f"[OK] Coqui TTS already available: {TTS.__version__}")
+    # Probe without importing: importing TTS pulls in torch, which is only needed when the model loads
+    if importlib.util.find_spec("TTS") is not None:
+        try:
+            version = importlib.metadata.version("coqui-tts")
+        except importlib.metadata.PackageNotFoundError:
+            version = "unknown"
+        print(f"[OK] Coqui TTS already available: {version}")
         return True
-    except ImportError:
+    else:
         print("[INFO] Coqui TTS not found, installing...")
         try:
             # Install Coqui TTS
             subprocess.check_call([
-                sys.executable, "-m", "pip", "install", 
-                "--no-cache-dir", "coqui-tts==0.27.0"
+                sys.executable, "-m", "pip", "install",
+                "--no-cache-dir", "--prefer-binary", "--no-input", "coqui-tts==0.27.0"
             ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
             # Verify installation
+            importlib.invalidate_caches()
             import TTS
             print(f"[OK] Coqui TTS installed successfully: {TTS.__version__}")
             return True
@@ -238,6 +248,7 @@ class VoiceCloningQueueConsumer:
         
 
         self.tts_generator = None
+        self._warmup_thread = None
         self.running = False
         self.message_consumer = None
         
@@ -310,6 +321,20 @@ class VoiceCloningQueueConsumer:
                 queue_name=self.queue_name
             )
     
+    def _start_warmup(self):
+        """Load and warm up the model in the background while the queue connection is set up"""
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(
+                target=self.tts_generator.warmup_model, name="tts-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+    
+    def _wait_for_warmup(self):
+        """Block until the background model warmup has finished"""
+        if self._warmup_thread is not None:
+            self._warmup_thread.join()
+            self._warmup_thread = None
+    
     def _process_single_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process a single TTS generation request
@@ -321,6 +346,7 @@ class VoiceCloningQueueConsumer:
             Processing result
         """
         try:
+            self._wait_for_warmup()
             start_time = time.time()
             logger.info(f"Processing TTS request: {message.get('id', 'unknown')}")
             
@@ -454,7 +480,10 @@ class VoiceCloningQueueConsumer:
             )
             
             if success:
-                file_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+                try:
+                    file_size = os.stat(output_path).st_size
+                except OSError:
+                    file_size = 0
                 logger.info(f"Single TTS generated successfully: {output_path} ({file_size} bytes)")
                 
                 return {
@@ -490,22 +519,23 @@ class VoiceCloningQueueConsumer:
             temp_json_path = os.path.join(output_dir, f"temp_messages_{int(time.time())}.json")
             os.makedirs(output_dir, exist_ok=True)
             
-            # Convert messages to the format expected by voice cloning system
-            voice_cloning_messages = []
-            for i, msg in enumerate(messages):
-                voice_cloning_message = {
-                    "id": i,
-                    "texto": msg.get('text', ''),
-                    "usuario": {
-                        "id": msg.get('from_user', 'unknown').lower(),
-                        "nome": msg.get('from_user', 'unknown')
-                    }
-                }
-                voice_cloning_messages.append(voice_cloning_message)
-            
-            # Save to temporary JSON file
+            # Save to temporary JSON file, converting each message to the format expected
+            # by the voice cloning system as it is written (no intermediate list)
             with open(temp_json_path, 'w', encoding='utf-8') as f:
-                json.dump({"mensagens": voice_cloning_messages}, f, ensure_ascii=False, indent=2)
+                f.write('{"mensagens": [')
+                for i, msg in enumerate(messages):
+                    if i:
+                        f.write(', ')
+                    from_user = msg.get('from_user', 'unknown')
+                    json.dump({
+                        "id": i,
+                        "texto": msg.get('text', ''),
+                        "usuario": {
+                            "id": from_user.lower(),
+                            "nome": from_user
+                        }
+                    }, f, ensure_ascii=False)
+                f.write(']}')
             
             # Load messages into TTS generator
             if not self.tts_generator.load_messages_from_json(temp_json_path):
@@ -540,10 +570,13 @@ class VoiceCloningQueueConsumer:
             audio_paths = []
             for char_id, character in self.tts_generator.get_characters().items():
                 char_dir = os.path.join(output_dir, char_id)
-                if os.path.exists(char_dir):
-                    for file in os.listdir(char_dir):
-                        if file.endswith('.wav'):
-                            audio_paths.append(os.path.join(char_dir, file))
+                try:
+                    files = os.listdir(char_dir)
+                except OSError:
+                    continue
+                for file in files:
+                    if file.endswith('.wav'):
+                        audio_paths.append(os.path.join(char_dir, file))
             
             logger.info(f"Batch TTS completed: {len(audio_paths)} audio files generated")
             
@@ -608,6 +641,9 @@ class VoiceCloningQueueConsumer:
         logger.info("Starting Voice Cloning Queue Consumer (Single Message Mode)...")
         self.running = True
         
+        # Only this mode synthesizes; database mode never needs the model
+        self._start_warmup()
+        
         try:
             # Process one message and exit
             result = self._consume_single_message()
@@ -5,9 +5,77 @@ Módulo para limpeza e processamento de texto para TTS
 """
 
 import re
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 from config import TEXT_CLEANING
 
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Funde intervalos de code points sobrepostos ou contíguos"""
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+# Padrões compilados uma única vez no carregamento do módulo e compartilhados pelas instâncias
+
+# Padrão para detectar emojis
+_EMOJI_RANGES = [
+    (0x1F600, 0x1F64F),  # emoticons
+    (0x1F300, 0x1F5FF),  # símbolos & pictogramas
+    (0x1F680, 0x1F6FF),  # transporte & símbolos
+    (0x1F1E0, 0x1F1FF),  # bandeiras (ISO 3166)
+    (0x02702, 0x027B0),  # Dingbats
+    (0x024C2, 0x1F251),  # enclosed characters
+    (0x1F900, 0x1F9FF),  # Supplemental Symbols and Pictographs
+    (0x1FA70, 0x1FAFF),  # Symbols and Pictographs Extended-A
+]
+# Intervalos fundidos: menos faixas para o regex testar a cada caractere
+_EMOJI_RE = re.compile(
+    "[" + "".join(f"{chr(start)}-{chr(end)}" for start, end in _merge_ranges(_EMOJI_RANGES)) + "]+",
+    flags=re.UNICODE
+)
+
+# Padrões para caracteres especiais (mais conservador)
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s\.,!?;:\-\'\"()]')
+# Para texto ASCII, a mesma remoção como tabela do str.translate (derivada do padrão)
+_ASCII_SPECIAL_CHARS_TABLE = {code: None for code in range(128) if _SPECIAL_CHARS_RE.match(chr(code))}
+
+# Padrões para múltiplos espaços
+_MULTIPLE_SPACES_RE = re.compile(r'\s+')
+
+# Padrões para pontuação problemática no TTS (mais específico)
+_PROBLEMATIC_PUNCTUATION_RE = re.compile(r'\.{3,}|…+')  # Apenas reticências múltiplas
+
+# Caracteres que causam problemas específicos no TTS (removidos numa única passada)
+_PROBLEMATIC_CHARS_TABLE = str.maketrans('', '', '–—°™®©')
+
+_FINAL_DOT_RE = re.compile(r'\.(\s+|$)')
+# Pontuação de pausa e o caractere seguinte (se não for espaço nem outra pausa)
+_PAUSE_PUNCTUATION_RE = re.compile(r'([,!?;:])([^\s,!?;:])?')
+_HYPHEN_RE = re.compile(r'(\w)-(\w)')
+
+# Contrações comuns em português
+_CONTRACTIONS = {
+    'pra': 'para',
+    'pro': 'para o',
+    'pros': 'para os', 
+    'pras': 'para as',
+    'num': 'em um',
+    'numa': 'em uma',
+    'nuns': 'em uns',
+    'numas': 'em umas',
+    'dum': 'de um',
+    'duma': 'de uma'
+}
+# Word boundaries para evitar substituições incorretas
+_CONTRACTIONS_RE = re.compile(r'\b(' + '|'.join(map(re.escape, _CONTRACTIONS)) + r')\b', flags=re.IGNORECASE)
+
+_SPACE_BEFORE_PUNCTUATION_RE = re.compile(r'\s+([,!?;:.\)])')
+_SPACE_AFTER_PUNCTUATION_RE = re.compile(r'([,!?;:.])([^\s])')
+
 class TextCleaner:
     """Classe responsável pela limpeza e preparação de texto para TTS"""
     
@@ -20,37 +88,39 @@ class TextCleaner:
         """
         self.config = config or TEXT_CLEANING
         
-        # Padrão para detectar emojis
-        self.emoji_pattern = re.compile("["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # símbolos & pictogramas
-            u"\U0001F680-\U0001F6FF"  # transporte & símbolos
-            u"\U0001F1E0-\U0001F1FF"  # bandeiras (ISO 3166)
-            u"\U00002702-\U000027B0"  # Dingbats
-            u"\U000024C2-\U0001F251"  # enclosed characters
-            u"\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-            u"\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-            "]+", flags=re.UNICODE)
-        
-        # Padrões para caracteres especiais (mais conservador)
-        self.special_chars_pattern = re.compile(r'[^\w\s\.,!?;:\-\'\"()]')
-        
-        # Padrões para múltiplos espaços
-        self.multiple_spaces_pattern = re.compile(r'\s+')
-        
-        # Padrões para pontuação problemática no TTS (mais específico)
-        self.problematic_punctuation = re.compile(r'\.{3,}|…+')  # Apenas reticências múltiplas
+        # Mensagens repetidas ("sim", "kkk", saudações) são limpas uma única vez por instância
+        self._clean_text_cached = lru_cache(maxsize=10000)(self._clean_text)
+        
+        # Padrões do módulo (já compilados; criar uma instância não compila nada)
+        self.emoji_pattern = _EMOJI_RE
+        self.special_chars_pattern = _SPECIAL_CHARS_RE
+        self.ascii_special_chars_table = _ASCII_SPECIAL_CHARS_TABLE
+        self.multiple_spaces_pattern = _MULTIPLE_SPACES_RE
+        self.problematic_punctuation = _PROBLEMATIC_PUNCTUATION_RE
+        self.problematic_chars_table = _PROBLEMATIC_CHARS_TABLE
+        self.final_dot_pattern = _FINAL_DOT_RE
+        self.pause_punctuation_pattern = _PAUSE_PUNCTUATION_RE
+        self.hyphen_pattern = _HYPHEN_RE
+        self.contractions = _CONTRACTIONS
+        self.contractions_pattern = _CONTRACTIONS_RE
+        self.space_before_punctuation_pattern = _SPACE_BEFORE_PUNCTUATION_RE
+        self.space_after_punctuation_pattern = _SPACE_AFTER_PUNCTUATION_RE
     
     def remove_emojis(self, text: str) -> str:
         """Remove emojis do texto"""
         if not self.config.get('remove_emojis', True):
             return text
+        # Todos os intervalos de emoji estão fora do ASCII
+        if text.isascii():
+            return text
         return self.emoji_pattern.sub('', text)
     
     def remove_special_characters(self, text: str) -> str:
         """Remove caracteres especiais mantendo pontuação básica"""
         if not self.config.get('remove_special_chars', True):
             return text
+        if text.isascii():
+            return text.translate(self.ascii_special_chars_table)
         return self.special_chars_pattern.sub('', text)
     
     def normalize_punctuation(self, text: str) -> str:
@@ -61,25 +131,29 @@ class TextCleaner:
         if not self.config.get('remove_dots', True):
             return text
         
+        # Sem nenhum ponto, os passos 1-3 não têm o que fazer (checagem barata antes dos regex)
+        has_dot = '.' in text
+        
         # 1. PRESERVAR ABREVIAÇÕES IMPORTANTES (não remover seus pontos)
-        abreviacoes = ['Dr.', 'Dra.', 'Sr.', 'Sra.', 'Prof.', 'Profa.', 'etc.', 'ex.', 'vs.', 'p.ex.']
         marcadores_abrev = {}
-        for i, abrev in enumerate(abreviacoes):
-            marcador = f"__ABREV_{i}__"
-            if abrev in text:
-                text = text.replace(abrev, marcador)
-                marcadores_abrev[marcador] = abrev
+        if has_dot:
+            abreviacoes = ['Dr.', 'Dra.', 'Sr.', 'Sra.', 'Prof.', 'Profa.', 'etc.', 'ex.', 'vs.', 'p.ex.']
+            for i, abrev in enumerate(abreviacoes):
+                marcador = f"__ABREV_{i}__"
+                if abrev in text:
+                    text = text.replace(abrev, marcador)
+                    marcadores_abrev[marcador] = abrev
         
         # 2. Remover apenas reticências múltiplas problemáticas
-        text = re.sub(r'\.{3,}', '', text)  # Remove ... .... etc
-        text = text.replace('…', '')  # Remove ellipsis unicode
+        if has_dot or '…' in text:
+            text = self.problematic_punctuation.sub('', text)  # Remove ... .... etc e ellipsis unicode
         
         # 3. TÉCNICA INTELIGENTE: Substituir pontos finais por vírgulas para manter entonação
         # Isso evita que o TTS fale "ponto" mas mantém a pausa natural
-        text = re.sub(r'\.(\s+|$)', r',\1', text)  # Ponto final → vírgula
+        if has_dot:
+            text = self.final_dot_pattern.sub(r',\1', text)  # Ponto final → vírgula
         
-        # 4. Remover pontos isolados ou problemáticos (que não são finais)
-        text = re.sub(r'(\s)\.(\s)', r'\1\2', text)  # Remove pontos no meio
+        # 4. Pontos isolados entre espaços já viraram vírgula no passo 3
         
         # 5. Para frases que terminariam abruptamente, adicionar pausa natural
         if text.strip() and not text.strip().endswith((',', '!', '?', ':')):
@@ -91,10 +165,9 @@ class TextCleaner:
             abrev_segura = abrev_original.replace('.', ',')
             text = text.replace(marcador, abrev_segura)
         
-        # 7. Remover pontuação que causa problemas específicos no TTS
-        problematic_chars = ['–', '—', '°', '™', '®', '©']
-        for char in problematic_chars:
-            text = text.replace(char, '')
+        # 7. Remover pontuação que causa problemas específicos no TTS (todos fora do ASCII)
+        if not text.isascii():
+            text = text.translate(self.problematic_chars_table)
         
         return text
     
@@ -103,11 +176,8 @@ class TextCleaner:
         MELHORADO: Adiciona melhorias específicas para síntese de fala
         Coordenado com normalize_punctuation para evitar conflitos
         """
-        # Garantir pausas pequenas antes de pontuação importante
-        text = re.sub(r'([,!?;:])', r' \1', text)
-        
-        # Garantir espaço após pontuação
-        text = re.sub(r'([,!?;:])([^\s])', r'\1 \2', text)
+        # Garantir pausas pequenas antes de pontuação importante e espaço depois dela (uma passada)
+        text = self.pause_punctuation_pattern.sub(self._space_around_pause, text)
         
         # Como normalize_punctuation já adiciona vírgulas no final,
         # só precisamos garantir que haja uma pausa se não houver pontuação
@@ -120,31 +190,26 @@ class TextCleaner:
         
         return text
     
+    @staticmethod
+    def _space_around_pause(match: "re.Match") -> str:
+        """Espaço antes da pontuação e, se colada a um caractere, também depois"""
+        following = match.group(2)
+        if following:
+            return f" {match.group(1)} {following}"
+        return f" {match.group(1)}"
+    
     def fix_word_boundaries(self, text: str) -> str:
         """Corrige problemas de fronteiras de palavras"""
         # Garantir espaços corretos ao redor de hífen
-        text = re.sub(r'(\w)-(\w)', r'\1 - \2', text)
-        
-        # Corrigir contrações comuns em português
-        contractions = {
-            'pra': 'para',
-            'pro': 'para o',
-            'pros': 'para os', 
-            'pras': 'para as',
-            'num': 'em um',
-            'numa': 'em uma',
-            'nuns': 'em uns',
-            'numas': 'em umas',
-            'dum': 'de um',
-            'duma': 'de uma'
-        }
-        
-        for contraction, expansion in contractions.items():
-            # Usar word boundaries para evitar substituições incorretas
-            pattern = r'\b' + re.escape(contraction) + r'\b'
-            text = re.sub(pattern, expansion, text, flags=re.IGNORECASE)
+        if '-' in text:
+            text = self.hyphen_pattern.sub(r'\1 - \2', text)
         
-        return text
+        # Corrigir contrações comuns em português (todas numa única passada)
+        return self.contractions_pattern.sub(self._expand_contraction, text)
+    
+    def _expand_contraction(self, match: "re.Match") -> str:
+        """Expansão da contração encontrada (a busca ignora maiúsculas)"""
+        return self.contractions[match.group(1).lower()]
     
     def normalize_spaces(self, text: str) -> str:
         """Normaliza espaços múltiplos"""
@@ -155,10 +220,10 @@ class TextCleaner:
         text = self.multiple_spaces_pattern.sub(' ', text)
         
         # Corrigir espaços antes de pontuação (exceto abertura)
-        text = re.sub(r'\s+([,!?;:.\)])', r'\1', text)
+        text = self.space_before_punctuation_pattern.sub(r'\1', text)
         
         # Garantir espaço após pontuação de fechamento
-        text = re.sub(r'([,!?;:.])([^\s])', r'\1 \2', text)
+        text = self.space_after_punctuation_pattern.sub(r'\1 \2', text)
         
         return text.strip()
     
@@ -175,6 +240,24 @@ class TextCleaner:
         if not text or not isinstance(text, str):
             return ""
         
+        return self._clean_text_cached(text)
+    
+    def __getstate__(self):
+        # O cache não é serializável (ex.: pickle); é recriado vazio
+        state = self.__dict__.copy()
+        del state['_clean_text_cached']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._clean_text_cached = lru_cache(maxsize=10000)(self._clean_text)
+    
+    def clean_text_cache_info(self):
+        """Estatísticas do cache de clean_text (hits, misses, tamanho)"""
+        return self._clean_text_cached.cache_info()
+    
+    def _clean_text(self, text: str) -> str:
+        """Pipeline de limpeza sem cache (ver clean_text)"""
         # Aplicar limpezas em sequência otimizada
         cleaned = text
         
@@ -198,28 +281,32 @@ class TextCleaner:
         
         return cleaned
     
-    def clean_message_batch(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def clean_message_batch(self, messages: List[Dict[str, Any]], copy: bool = True) -> List[Dict[str, Any]]:
         """
         Limpa um lote de mensagens
         
         Args:
             messages: Lista de mensagens com campo 'texto'
+            copy: Se False, atualiza 'texto' nas próprias mensagens em vez de criar cópias
             
         Returns:
             Lista de mensagens com texto limpo
         """
+        clean_text = self.clean_text  # resolvido uma vez, não a cada mensagem
         cleaned_messages = []
         
         for message in messages:
             if isinstance(message, dict) and 'texto' in message:
-                original_text = message['texto']
-                cleaned_text = self.clean_text(original_text)
+                cleaned_text = clean_text(message['texto'])
                 
-                # Só incluir se o texto não ficou vazio
-                if cleaned_text.strip():
-                    message_copy = message.copy()
-                    message_copy['texto'] = cleaned_text
-                    cleaned_messages.append(message_copy)
+                # Só incluir se o texto não ficou vazio (sem alocar uma cópia com strip)
+                if cleaned_text and not cleaned_text.isspace():
+                    if copy:
+                        # Uma única fusão em C em vez de copy() seguido de atribuição
+                        message = {**message, 'texto': cleaned_text}
+                    else:
+                        message['texto'] = cleaned_text
+                    cleaned_messages.append(message)
         
         return cleaned_messages
     
@@ -234,11 +321,16 @@ class TextCleaner:
         Returns:
             Dicionário com estatísticas
         """
+        original_length = len(original)
+        cleaned_length = len(cleaned)
+        removed_chars = original_length - cleaned_length
+        
         return {
-            'original_length': len(original),
-            'cleaned_length': len(cleaned),
-            'removed_chars': len(original) - len(cleaned),
-            'removal_rate': ((len(original) - len(cleaned)) / len(original) * 100) if original else 0,
-            'has_emojis': bool(self.emoji_pattern.search(original)),
+            'original_length': original_length,
+            'cleaned_length': cleaned_length,
+            'removed_chars': removed_chars,
+            'removal_rate': (removed_chars / original_length * 100) if original_length else 0,
+            # Emojis ficam todos fora do ASCII: texto ASCII dispensa a busca
+            'has_emojis': not original.isascii() and self.emoji_pattern.search(original) is not None,
             'has_special_chars': bool(self.special_chars_pattern.search(original))
         } 
\ No newline at end of file
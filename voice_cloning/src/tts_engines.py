@@ -13,7 +13,11 @@ os.environ['LIBROSA_CACHE_DIR'] = '/tmp/librosa_cache'
 os.environ['LIBROSA_CACHE_LEVEL'] = '0'
 
 import sys
-import tempfile
+import uuid
+import struct
+import importlib.util
+from contextlib import ExitStack
+from functools import lru_cache
 from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any, List
 from config import TTS_CONFIG
@@ -22,9 +26,23 @@ import time
 class AutoAcceptTTS:
     """Wrapper para TTS que aceita automaticamente prompts de licença"""
     
-    def __init__(self, model_name: str):
+    def __init__(self, model_name: str, device: str = "auto", mixed_precision: bool = True):
         self.model_name = model_name
+        self.device = device
+        self.mixed_precision = mixed_precision
         self._tts_instance = None
+        self._on_cuda = False
+        self._use_bf16 = False  # Autocast BF16 só em GPUs com suporte nativo
+    
+    def _resolve_device(self) -> str:
+        """Resolve o dispositivo de inferência ('auto' usa CUDA quando disponível)"""
+        if self.device != "auto":
+            return self.device
+        try:
+            import torch
+            return "cuda" if torch.cuda.is_available() else "cpu"
+        except ImportError:
+            return "cpu"
         
     def _create_tts_instance(self):
         """Cria instância TTS com aceitação automática de licença"""
@@ -43,12 +61,96 @@ class AutoAcceptTTS:
             self._tts_instance = TTSCore(self.model_name)
         finally:
             sys.stdin = original_stdin
+        
+        device = self._resolve_device()
+        if device != "cpu":
+            self._tts_instance = self._tts_instance.to(device)
+            print(f"[INFO] Modelo Coqui movido para: {device}")
+        
+        self._on_cuda = device.startswith("cuda")
+        if self._on_cuda:
+            import torch
+            # TF32 nas matmuls e autotune do cuDNN (Ampere ou superior)
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+            torch.backends.cudnn.benchmark = True
+            torch.set_float32_matmul_precision("high")
+            
+            # Antes do Ampere o BF16 é emulado (lento) ou falha; nesses casos fica em FP32
+            self._use_bf16 = self.mixed_precision and torch.cuda.is_bf16_supported()
+            if self.mixed_precision and not self._use_bf16:
+                print("[INFO] GPU sem suporte a BF16, inferência em FP32")
+    
+    def inference_context(self) -> ExitStack:
+        """Contexto de inferência: sem autograd e, em CUDA com suporte, autocast BF16"""
+        stack = ExitStack()
+        try:
+            import torch
+        except ImportError:
+            return stack
+        stack.enter_context(torch.inference_mode())
+        if self._use_bf16:
+            stack.enter_context(torch.autocast("cuda", dtype=torch.bfloat16))
+        return stack
     
     def tts_to_file(self, **kwargs):
         """Wrapper para tts_to_file com instância automática"""
         if self._tts_instance is None:
             self._create_tts_instance()
-        return self._tts_instance.tts_to_file(**kwargs)
+        with self.inference_context():
+            return self._tts_instance.tts_to_file(**kwargs)
+    
+    def warmup(self, language: str, speaker_wav: Optional[str] = None):
+        """
+        Carrega o modelo e executa uma síntese descartável
+        
+        Tira da primeira requisição real o custo de alocação e autotune do cuDNN.
+        
+        Args:
+            language: Idioma da síntese
+            speaker_wav: Voz de referência para a síntese de aquecimento
+        """
+        if self._tts_instance is None:
+            self._create_tts_instance()
+        
+        try:
+            kwargs = {'text': ".", 'language': language}
+            if speaker_wav:
+                kwargs['speaker_wav'] = speaker_wav
+            with self.inference_context():
+                self._tts_instance.tts(**kwargs)
+            if self._on_cuda:
+                import torch
+                torch.cuda.synchronize()
+            print("[OK] Aquecimento do modelo Coqui concluído")
+        except Exception as e:
+            print(f"[WARNING] Aquecimento do modelo Coqui falhou: {e}")
+    
+    @property
+    def synthesizer(self):
+        """Synthesizer do Coqui (divisão em frases e gravação normalizada do tts_to_file)"""
+        if self._tts_instance is None:
+            self._create_tts_instance()
+        return self._tts_instance.synthesizer
+    
+    @property
+    def tts_model(self):
+        """Modelo subjacente (XTTS) para chamadas diretas de inferência"""
+        return self.synthesizer.tts_model
+
+@lru_cache(maxsize=None)
+def get_shared_tts(model_name: str, device: str = "auto", mixed_precision: bool = True) -> AutoAcceptTTS:
+    """
+    Retorna a instância TTS compartilhada no processo para o modelo
+    
+    O XTTS é multilíngue (o idioma vai em cada síntese), então engines e
+    geradores do mesmo processo reutilizam um único modelo carregado.
+    """
+    return AutoAcceptTTS(
+        model_name,
+        device=device,
+        mixed_precision=mixed_precision
+    )
 
 class TTSEngine(ABC):
     """Classe base abstrata para engines TTS"""
@@ -85,9 +187,27 @@ class TTSEngine(ABC):
         """
         pass
     
+    def synthesize_batch(self, texts: List[str], output_files: List[str], reference_audio: Optional[str] = None) -> List[bool]:
+        """
+        Sintetiza um lote de textos (padrão: um a um)
+        
+        Args:
+            texts: Textos a serem sintetizados
+            output_files: Arquivos de saída (um por texto)
+            reference_audio: Arquivo de áudio de referência (para clonagem)
+            
+        Returns:
+            Lista com o resultado de cada texto
+        """
+        return [self.synthesize_to_file(text, output_file, reference_audio)
+                for text, output_file in zip(texts, output_files)]
+    
     def validate_output(self, output_file: str) -> bool:
         """Valida se o arquivo de saída foi criado corretamente"""
-        return os.path.exists(output_file) and os.path.getsize(output_file) > 100
+        try:
+            return os.stat(output_file).st_size > 100
+        except OSError:
+            return False
     
     def add_audio_padding(self, audio_file: str, padding_ms: int = 500) -> bool:
         """
@@ -100,15 +220,22 @@ class TTSEngine(ABC):
         Returns:
             True se sucesso
         """
+        try:
+            # Caminho rápido: acrescentar o silêncio no próprio arquivo, sem decodificar o áudio
+            if self._append_wav_silence(audio_file, padding_ms):
+                print(f"[INFO] Padding de {padding_ms}ms adicionado ao áudio")
+                return True
+        except (OSError, struct.error) as e:
+            print(f"[WARNING] Padding direto no WAV falhou, usando pydub: {e}")
+        
         try:
             from pydub import AudioSegment
-            from pydub.silence import generate_silence
             
             # Carregar áudio
             audio = AudioSegment.from_wav(audio_file)
             
-            # Criar silêncio
-            silence = generate_silence(duration=padding_ms)
+            # Criar silêncio (mesma taxa de amostragem do áudio)
+            silence = AudioSegment.silent(duration=padding_ms, frame_rate=audio.frame_rate)
             
             # Adicionar padding no final
             audio_with_padding = audio + silence
@@ -125,6 +252,65 @@ class TTSEngine(ABC):
         except Exception as e:
             print(f"[WARNING] Erro ao adicionar padding: {e}")
             return False
+    
+    @staticmethod
+    def _append_wav_silence(audio_file: str, padding_ms: int) -> bool:
+        """
+        Acrescenta silêncio ao fim do chunk 'data' de um WAV PCM/float, corrigindo os tamanhos no cabeçalho
+        
+        Lê apenas os cabeçalhos dos chunks; as amostras existentes não são lidas nem copiadas.
+        
+        Returns:
+            False se o arquivo não permitir o acréscimo no lugar (formato comprimido,
+            chunk 'data' que não é o último, etc.)
+        """
+        with open(audio_file, 'r+b') as f:
+            riff_header = f.read(12)
+            if len(riff_header) < 12 or riff_header[:4] != b'RIFF' or riff_header[8:12] != b'WAVE':
+                return False
+            
+            # Percorrer os chunks até 'data', guardando o 'fmt '
+            fmt = None
+            while True:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    return False
+                chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+                if chunk_id == b'data':
+                    break
+                if chunk_id == b'fmt ':
+                    fmt = f.read(chunk_size)
+                    f.seek(chunk_size % 2, os.SEEK_CUR)
+                else:
+                    f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+            
+            if fmt is None or len(fmt) < 16:
+                return False
+            format_tag, _, sample_rate, _, block_align, bits_per_sample = struct.unpack('<HHIIHH', fmt[:16])
+            if format_tag == 0xFFFE and len(fmt) >= 26:  # WAVE_FORMAT_EXTENSIBLE: formato real no SubFormat
+                format_tag = struct.unpack('<H', fmt[24:26])[0]
+            if format_tag not in (1, 3) or block_align == 0:  # apenas PCM e IEEE float
+                return False
+            
+            # O chunk 'data' precisa terminar no fim do arquivo para crescer no lugar
+            data_size_offset = f.tell() - 4
+            file_size = f.seek(0, os.SEEK_END)
+            if data_size_offset + 4 + chunk_size != file_size:
+                return False
+            
+            silence_size = (sample_rate * padding_ms // 1000) * block_align
+            if file_size + silence_size - 8 > 0xFFFFFFFF:
+                return False
+            
+            # PCM de 8 bits é sem sinal: o silêncio é 0x80, não zero
+            f.write((b'\x80' if format_tag == 1 and bits_per_sample == 8 else b'\x00') * silence_size)
+            
+            f.seek(data_size_offset)
+            f.write(struct.pack('<I', chunk_size + silence_size))
+            f.seek(4)
+            f.write(struct.pack('<I', file_size + silence_size - 8))
+        
+        return True
 
 class CoquiTTSEngine(TTSEngine):
     """Engine Coqui TTS com suporte a clonagem de voz e melhorias anti-corte"""
@@ -135,21 +321,20 @@ class CoquiTTSEngine(TTSEngine):
         self.supports_voice_cloning = True
         self.model_name = self.config.get('model_name', "tts_models/multilingual/multi-dataset/xtts_v2")
         self.language = self.config.get('language', "pt")
+        # Calculado uma vez: modelos multilíngues (XTTS) exigem o idioma em cada síntese
+        model_name_lower = self.model_name.lower()
+        self.is_multilingual = "multilingual" in model_name_lower or "xtts" in model_name_lower
         self.tts_instance: Optional[Any] = None
+        self._conditioning_cache: Dict[tuple, Any] = {}  # (reference_audio, mtime, tamanho) -> latentes de condicionamento
         self.is_available = self.is_engine_available()
     
     def is_engine_available(self) -> bool:
-        """Verifica se Coqui TTS está disponível"""
+        """Verifica se Coqui TTS está instalado (sem importar torch/TTS; o import real ocorre ao carregar o modelo)"""
         try:
-            import TTS
-            from TTS.api import TTS as TTSCore
-            return True
-        except ImportError as e:
+            return importlib.util.find_spec("TTS") is not None
+        except (ImportError, ValueError) as e:
             print(f"[DEBUG] ImportError: {e}")
             return False
-        except Exception as e:
-            print(f"[DEBUG] Exception: {e}")
-            return False
     
     def _load_model(self) -> bool:
         """Carrega o modelo TTS"""
@@ -159,8 +344,12 @@ class CoquiTTSEngine(TTSEngine):
         try:
             print(f"[INFO] Carregando modelo Coqui: {self.model_name}")
             
-            # Use the auto-accept wrapper
-            self.tts_instance = AutoAcceptTTS(self.model_name)
+            # Use the auto-accept wrapper (shared across engines in this process)
+            self.tts_instance = get_shared_tts(
+                self.model_name,
+                device=self.config.get('device', "auto"),
+                mixed_precision=self.config.get('mixed_precision', True)
+            )
             print("[OK] Modelo Coqui carregado com sucesso")
             return True
                 
@@ -168,6 +357,22 @@ class CoquiTTSEngine(TTSEngine):
             print(f"[ERROR] Erro ao carregar modelo Coqui: {e}")
             return False
     
+    def warmup(self, reference_audio: Optional[str] = None) -> bool:
+        """
+        Carrega o modelo e faz uma síntese de aquecimento
+        
+        Args:
+            reference_audio: Voz de referência para o aquecimento
+            
+        Returns:
+            True se o modelo foi carregado
+        """
+        if not self.is_available or not self._load_model():
+            return False
+        
+        self.tts_instance.warmup(self.language, reference_audio if self.supports_voice_cloning else None)
+        return True
+    
     def _prepare_text_for_synthesis(self, text: str) -> str:
         """Prepara texto especificamente para Coqui TTS"""
         # Garantir que o texto termine adequadamente
@@ -198,44 +403,20 @@ class CoquiTTSEngine(TTSEngine):
             print(f"[DEBUG] Texto preparado: '{prepared_text}'")
             
             # Usar arquivo temporário primeiro
-            temp_file = tempfile.mktemp(suffix=".wav")
+            temp_file = self._temp_path_for(output_file)
             
             try:
+                synthesis_kwargs = {'text': prepared_text, 'file_path': temp_file}
+                if self.is_multilingual:
+                    synthesis_kwargs['language'] = self.language
                 if reference_audio and self.supports_voice_cloning:
                     # Usar clonagem de voz com configurações melhoradas
-                    self.tts_instance.tts_to_file(
-                        text=prepared_text,
-                        speaker_wav=reference_audio,
-                        language=self.language,
-                        file_path=temp_file,
-                        speed=1.0,  # Velocidade normal para evitar cortes
-                        # Adicionar configurações específicas se disponíveis
-                    )
-                else:
-                    # Usar voz padrão
-                    self.tts_instance.tts_to_file(
-                        text=prepared_text,
-                        file_path=temp_file
-                    )
+                    synthesis_kwargs['speaker_wav'] = reference_audio
+                    synthesis_kwargs['speed'] = 1.0  # Velocidade normal para evitar cortes
                 
-                # Verificar se arquivo temporário foi criado
-                if not self.validate_output(temp_file):
-                    print("[ERROR] Arquivo temporário não foi criado corretamente")
-                    return False
-                
-                # Adicionar padding para evitar cortes
-                self.add_audio_padding(temp_file, padding_ms=800)
+                self.tts_instance.tts_to_file(**synthesis_kwargs)
                 
-                # Mover arquivo temporário para o destino final
-                import shutil
-                shutil.move(temp_file, output_file)
-                
-                if self.validate_output(output_file):
-                    print(f"[OK] Coqui TTS bem-sucedido com padding: {output_file}")
-                    return True
-                else:
-                    print("[ERROR] Arquivo de saída final inválido")
-                    return False
+                return self._finalize_output(temp_file, output_file)
                     
             finally:
                 # Limpar arquivo temporário se ainda existir
@@ -248,6 +429,153 @@ class CoquiTTSEngine(TTSEngine):
         except Exception as e:
             print(f"[ERROR] Erro na síntese Coqui TTS: {e}")
             return False
+    
+    @staticmethod
+    def _temp_path_for(output_file: str) -> str:
+        """
+        Caminho temporário único ao lado do arquivo final
+        
+        No mesmo diretório o os.replace final é atômico, e o sufixo aleatório
+        evita colisões entre sínteses concorrentes.
+        """
+        base, _ = os.path.splitext(output_file)
+        return f"{base}.{uuid.uuid4().hex[:8]}.tmp.wav"
+    
+    def _finalize_output(self, temp_file: str, output_file: str) -> bool:
+        """Valida o arquivo temporário, adiciona padding e move para o destino final"""
+        # Verificar se arquivo temporário foi criado
+        if not self.validate_output(temp_file):
+            print("[ERROR] Arquivo temporário não foi criado corretamente")
+            return False
+        
+        # Adicionar padding para evitar cortes
+        self.add_audio_padding(temp_file, padding_ms=800)
+        
+        # Renomear atomicamente para o destino final (mesmo diretório)
+        os.replace(temp_file, output_file)
+        
+        if self.validate_output(output_file):
+            print(f"[OK] Coqui TTS bem-sucedido com padding: {output_file}")
+            return True
+        else:
+            print("[ERROR] Arquivo de saída final inválido")
+            return False
+    
+    def _get_conditioning_latents(self, reference_audio: str):
+        """Calcula uma única vez os latentes de condicionamento de uma voz de referência"""
+        # mtime e tamanho na chave: uma voz preparada regravada no mesmo caminho é recalculada
+        st = os.stat(reference_audio)
+        key = (reference_audio, st.st_mtime_ns, st.st_size)
+        if key not in self._conditioning_cache:
+            # Mesmos ajustes de referência que o Xtts.synthesize lê do config do modelo
+            config = self.tts_instance.tts_model.config
+            with self.tts_instance.inference_context():
+                self._conditioning_cache[key] = self.tts_instance.tts_model.get_conditioning_latents(
+                    audio_path=[reference_audio],
+                    gpt_cond_len=config.gpt_cond_len,
+                    gpt_cond_chunk_len=config.gpt_cond_chunk_len,
+                    max_ref_length=config.max_ref_len,
+                    sound_norm_refs=config.sound_norm_refs
+                )
+        return self._conditioning_cache[key]
+    
+    @staticmethod
+    def _inference_kwargs(tts_model) -> Dict[str, Any]:
+        """
+        Parâmetros de inferência equivalentes aos do Xtts.synthesize (usado pelo tts_to_file)
+        
+        Chamadas diretas a inference() usariam os padrões do método em vez da
+        amostragem do config do modelo. A divisão interna só atua em frases acima
+        do limite de caracteres do idioma, que o tts_to_file truncaria.
+        """
+        config = tts_model.config
+        return {
+            'temperature': config.temperature,
+            'length_penalty': config.length_penalty,
+            'repetition_penalty': config.repetition_penalty,
+            'top_k': config.top_k,
+            'top_p': config.top_p,
+            'enable_text_splitting': True,
+        }
+    
+    def synthesize_batch(self, texts: List[str], output_files: List[str], reference_audio: Optional[str] = None) -> List[bool]:
+        """
+        Sintetiza um lote de textos com a mesma voz de referência
+        
+        O XTTS não aceita vários textos em um único forward, então o ganho vem de
+        calcular os latentes da voz uma vez por lote. O restante segue o
+        tts_to_file: divisão em frases e silêncio entre elas pelo Synthesizer,
+        e gravação com a mesma normalização de pico (save_wav).
+        
+        Args:
+            texts: Textos a serem sintetizados
+            output_files: Arquivos de saída (um por texto)
+            reference_audio: Arquivo de áudio de referência (para clonagem)
+            
+        Returns:
+            Lista com o resultado de cada texto
+        """
+        if not self.is_available:
+            print("[ERROR] Coqui TTS não está disponível")
+            return [False] * len(texts)
+        
+        if not self._load_model():
+            return [False] * len(texts)
+        
+        # Sem voz de referência não há condicionamento a reaproveitar
+        if not (reference_audio and self.supports_voice_cloning):
+            return [self.synthesize_to_file(text, output_file) for text, output_file in zip(texts, output_files)]
+        
+        try:
+            try:
+                from TTS.utils.synthesizer import PAD_SILENCE_SAMPLES
+            except ImportError:
+                PAD_SILENCE_SAMPLES = 10000  # Valor fixo nas versões sem a constante
+            
+            synthesizer = self.tts_instance.synthesizer
+            tts_model = synthesizer.tts_model
+            gpt_cond_latent, speaker_embedding = self._get_conditioning_latents(reference_audio)
+            inference_kwargs = self._inference_kwargs(tts_model)
+        except Exception as e:
+            print(f"[WARNING] Lote indisponível, sintetizando um a um: {e}")
+            return [self.synthesize_to_file(text, output_file, reference_audio)
+                    for text, output_file in zip(texts, output_files)]
+        
+        print(f"[INFO] Sintetizando lote de {len(texts)} textos com Coqui TTS")
+        results = []
+        for text, output_file in zip(texts, output_files):
+            temp_file = self._temp_path_for(output_file)
+            try:
+                prepared_text = self._prepare_text_for_synthesis(text)
+                wavs = []
+                for sentence in synthesizer.split_into_sentences(prepared_text):
+                    with self.tts_instance.inference_context():
+                        out = tts_model.inference(
+                            sentence,
+                            self.language,
+                            gpt_cond_latent,
+                            speaker_embedding,
+                            speed=1.0,
+                            **inference_kwargs
+                        )
+                    wav = out['wav']
+                    if hasattr(wav, 'cpu'):
+                        wav = wav.float().cpu().numpy()
+                    wavs += list(wav.squeeze())
+                    wavs += [0] * PAD_SILENCE_SAMPLES
+                synthesizer.save_wav(wavs, temp_file)
+                results.append(self._finalize_output(temp_file, output_file))
+            except Exception as e:
+                print(f"[ERROR] Erro na síntese Coqui TTS: {e}")
+                results.append(False)
+            finally:
+                if os.path.exists(temp_file):
+                    try:
+                        os.remove(temp_file)
+                    except:
+                        pass
+        
+        return results
 
 class TTSEngineManager:
     """Gerenciador de engines TTS - apenas Coqui TTS"""
@@ -325,6 +653,41 @@ class TTSEngineManager:
         
         return engine.synthesize_to_file(text, output_file, reference_audio)
     
+    def warmup(self, reference_audio: Optional[str] = None) -> bool:
+        """
+        Aquece a melhor engine disponível
+        
+        Args:
+            reference_audio: Voz de referência para o aquecimento
+            
+        Returns:
+            True se sucesso
+        """
+        engine = self.get_best_engine()
+        if not engine or not hasattr(engine, 'warmup'):
+            return False
+        
+        return engine.warmup(reference_audio)
+    
+    def synthesize_batch_with_best_engine(self, texts: List[str], output_files: List[str], reference_audio: Optional[str] = None) -> List[bool]:
+        """
+        Sintetiza um lote de textos usando a melhor engine disponível
+        
+        Args:
+            texts: Textos para sintetizar
+            output_files: Arquivos de saída (um por texto)
+            reference_audio: Arquivo de referência para clonagem
+            
+        Returns:
+            Lista com o resultado de cada texto
+        """
+        engine = self.get_best_engine()
+        if not engine:
+            print("[ERROR] Nenhuma engine TTS disponível")
+            return [False] * len(texts)
+        
+        return engine.synthesize_batch(texts, output_files, reference_audio)
+    
     def get_engines_info(self) -> Dict[str, Dict[str, Any]]:
         """Retorna informações sobre as engines disponíveis"""
         info = {}
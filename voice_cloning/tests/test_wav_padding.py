@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test in-place WAV padding (TTSEngine._append_wav_silence)
+Uses only the standard library wave module to build and read the files
+"""
+
+import sys
+import os
+import struct
+import tempfile
+import wave
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tts_engines import TTSEngine
+
+def _write_wav(path, sample_width, frames, sample_rate=8000):
+    """Write a mono WAV with the given raw frames"""
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(sample_width)
+        w.setframerate(sample_rate)
+        w.writeframes(frames)
+
+def _read_wav(path):
+    """Return (sample_width, frame_rate, raw frames) of a WAV"""
+    with wave.open(path, 'rb') as w:
+        return w.getsampwidth(), w.getframerate(), w.readframes(w.getnframes())
+
+def test_pad_16bit_mono():
+    """16-bit PCM gets zero-filled frames and consistent header sizes"""
+    print("=== Testing 16-bit mono padding ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'audio.wav')
+        original = struct.pack('<4h', 1000, -1000, 2000, -2000)
+        _write_wav(path, 2, original)
+
+        assert TTSEngine._append_wav_silence(path, 250)
+
+        sample_width, frame_rate, frames = _read_wav(path)
+        assert (sample_width, frame_rate) == (2, 8000)
+        assert frames == original + b'\x00' * (2000 * 2)
+        with open(path, 'rb') as f:
+            riff_size = struct.unpack('<I', f.read(8)[4:])[0]
+        assert riff_size == os.path.getsize(path) - 8
+    print("✅ 16-bit mono padded")
+
+def test_pad_8bit_uses_unsigned_silence():
+    """8-bit PCM is unsigned, so silence is 0x80 rather than zero"""
+    print("\n=== Testing 8-bit padding ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'audio.wav')
+        original = bytes([0x10, 0xF0, 0x80])
+        _write_wav(path, 1, original)
+
+        assert TTSEngine._append_wav_silence(path, 100)
+
+        sample_width, _, frames = _read_wav(path)
+        assert sample_width == 1
+        assert frames == original + b'\x80' * 800
+    print("✅ 8-bit padded with 0x80")
+
+def test_trailing_chunk_declines():
+    """A chunk after 'data' cannot be grown in place; the file must stay untouched"""
+    print("\n=== Testing trailing LIST chunk ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'audio.wav')
+        _write_wav(path, 2, struct.pack('<2h', 1, -1))
+
+        # Append a LIST/INFO chunk after 'data' and fix the RIFF size
+        info = b'INFO' + b'ISFT' + struct.pack('<I', 4) + b'test'
+        with open(path, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            f.write(b'LIST' + struct.pack('<I', len(info)) + info)
+            size = f.tell()
+            f.seek(4)
+            f.write(struct.pack('<I', size - 8))
+        with open(path, 'rb') as f:
+            before = f.read()
+
+        assert not TTSEngine._append_wav_silence(path, 250)
+
+        with open(path, 'rb') as f:
+            assert f.read() == before
+    print("✅ Trailing chunk left untouched")
+
+def main():
+    """Run all tests"""
+    print("WAV Padding Test")
+    print("=" * 50)
+
+    tests = [
+        ("16-bit Mono", test_pad_16bit_mono),
+        ("8-bit Unsigned Silence", test_pad_8bit_uses_unsigned_silence),
+        ("Trailing Chunk", test_trailing_chunk_declines)
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} PASSED")
+        except Exception as e:
+            print(f"❌ {test_name} FAILED: {e!r}")
+
+    print(f"\n=== Test Results ===")
+    print(f"Passed: {passed}/{total}")
+
+    return 0 if passed == total else 1
+
+if __name__ == "__main__":
+    exit(main())